@@ -1,31 +1,525 @@
+import asyncio
 import io
+import itertools
 import logging
-from telebot import types, TeleBot
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiTelegramException
 from pytubefix import YouTube
+from pytubefix.exceptions import VideoUnavailable
 import re
+import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+from urllib3.util.retry import Retry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Bot token - Replace with your actual bot token
-BOT_TOKEN = '7512725094:AAHpsyKM1ifxzGlW30Boi_uoeo0EBFgfR8k'  # Replace this with your actual bot token from @BotFather
+# Bot token from @BotFather — fails fast at import if unset
+BOT_TOKEN = os.environ['BOT_TOKEN']
 
-if BOT_TOKEN == 'YOUR_BOT_TOKEN_HERE':
-    raise ValueError("Please replace 'YOUR_BOT_TOKEN_HERE' with your actual bot token")
+bot = AsyncTeleBot(BOT_TOKEN)
 
-bot = TeleBot(BOT_TOKEN)
+# Concurrency gates: a handful of simultaneous downloads keeps bandwidth and
+# disk bounded, and capping in-flight Telegram sends keeps us under the
+# bot-wide 30 msg/s API limit
+DL_SEM = asyncio.Semaphore(4)
+SEND_SEM = asyncio.Semaphore(30)
+
+# Worker processes for the download pipeline. At 1 (the default) everything
+# runs in this process; higher values make the main process a pure
+# poller/dispatcher with workers consuming from a shared queue
+WORKERS = int(os.environ.get('WORKERS', '1'))
+# Set in the parent when worker processes are running; workers keep it None.
+# One queue per worker: updates route by video ID so duplicates of the same
+# link land in the same process, where the in-flight coalescing map (which
+# is per-process) can still merge them
+_WORK_QUEUES = None
+_DISPATCH_RR = itertools.count()
+
+# Parallel download settings
+DOWNLOAD_WORKERS = 8
+# Global cap on concurrent range requests so we stay friendly with YouTube's per-IP limits
+_RANGE_SEM = threading.Semaphore(DOWNLOAD_WORKERS)
+# Buffers up to this size stay in RAM; anything larger spills to disk
+SPOOL_MAX = 32 << 20
+# Duration cap, checked before any heavy work
+MAX_DURATION = 21600  # 6 hours
+
+# One pooled session for all HTTP work: keep-alive connections skip the
+# TCP+TLS handshake on every fetch after the first
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+def _content_length(url):
+    """Get the size of a remote file via a HEAD request, or None if unknown"""
+    try:
+        resp = SESSION.head(url, timeout=30, allow_redirects=True)
+        resp.raise_for_status()
+        return int(resp.headers['Content-Length'])
+    except (requests.RequestException, KeyError, ValueError):
+        return None
+
+def _fetch_range(url, write_at, start, end):
+    """Download bytes [start, end] of url, writing each chunk via write_at(offset, chunk).
+
+    Returns the number of bytes written.
+    """
+    with _RANGE_SEM:
+        resp = SESSION.get(
+            url,
+            headers={'Range': f'bytes={start}-{end}'},
+            stream=True,
+            timeout=60
+        )
+        resp.raise_for_status()
+        if resp.status_code != 206:
+            # A server that ignores the Range header sends the whole body to
+            # every worker; writing that at 8 offsets would corrupt the file
+            resp.close()
+            raise requests.HTTPError(
+                f'expected 206 Partial Content for bytes={start}-{end}, got {resp.status_code}'
+            )
+        offset = start
+        for chunk in resp.iter_content(chunk_size=1024 * 1024):
+            write_at(offset, chunk)
+            offset += len(chunk)
+        return offset - start
+
+def parallel_download(url, length):
+    """Download url into a buffer using concurrent HTTP Range requests.
+
+    Splitting the transfer across several connections saturates the link far
+    better than a single TCP stream and cuts wall-clock download time.
+    Small files land in an in-memory bytearray; anything above SPOOL_MAX is
+    written to an unnamed temporary file via os.pwrite so the working set
+    stays bounded no matter how large the video is. Returns a seeked
+    file-like object.
+    """
+    if length <= SPOOL_MAX:
+        buf = bytearray(length)
+        view = memoryview(buf)
+
+        def write_at(offset, chunk):
+            view[offset:offset + len(chunk)] = chunk
+
+        buffer = None
+    else:
+        buffer = tempfile.TemporaryFile()
+        buffer.truncate(length)
+        fd = buffer.fileno()
+
+        def write_at(offset, chunk):
+            os.pwrite(fd, chunk, offset)
+
+    chunk_size = -(-length // DOWNLOAD_WORKERS)  # ceil division
+    ranges = [
+        (start, min(start + chunk_size, length) - 1)
+        for start in range(0, length, chunk_size)
+    ]
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = [
+            executor.submit(_fetch_range, url, write_at, start, end)
+            for start, end in ranges
+        ]
+        written = sum(future.result() for future in futures)
+
+    if written != length:
+        if buffer is not None:
+            buffer.close()
+        raise IOError(f'ranged download incomplete: got {written} of {length} bytes')
+
+    if buffer is None:
+        buffer = io.BytesIO(buf)
+    buffer.seek(0)
+    return buffer
+
+def _pick_stream(yt):
+    """Pick the best downloadable stream (blocking pytubefix work)"""
+    # Progressive mp4 itags are a tiny fixed set (22=720p, 18=360p), so try
+    # direct lookups before the allocation-heavy filter/sort chain
+    stream = yt.streams.get_by_itag(22) or yt.streams.get_by_itag(18)
+    if stream:
+        return stream
+
+    # Try to get the best progressive stream first
+    stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
+
+    if not stream:
+        # Fallback to any progressive stream
+        stream = yt.streams.filter(progressive=True).first()
+
+    if not stream:
+        # Final fallback to lowest resolution
+        stream = yt.streams.get_lowest_resolution()
+
+    return stream
+
+class NoStreamError(Exception):
+    """Raised when a video has no downloadable stream"""
+
+class VideoTooLongError(Exception):
+    """Raised when a video exceeds the duration cap"""
+
+@lru_cache(maxsize=512)
+def _resolve(video_id):
+    """Resolve (title, duration, stream_url, filesize) for a video ID.
+
+    Blocking pytubefix work: fetches the watch page and parses the player JS.
+    Cached by video ID so a popular link re-sent by many users pays the cost
+    only once. Videos we would refuse anyway are rejected before stream
+    enumeration; those rejections raise (uncached), as does NoStreamError.
+    """
+    # Cheap oembed probe catches dead videos before the full watch-page
+    # fetch and player JS parse. Only 400/404 mean the video is gone —
+    # oembed answers 401 for embedding-disabled videos that download fine,
+    # so restricted cases are left for pytubefix to judge
+    probe = SESSION.get(
+        f"https://www.youtube.com/oembed?url=https://youtu.be/{video_id}&format=json",
+        timeout=15
+    )
+    if probe.status_code in (400, 404):
+        raise VideoUnavailable(video_id)
+
+    yt = YouTube(f"https://youtu.be/{video_id}")
+    title = yt.title
+    duration = yt.length
+    if duration > MAX_DURATION:
+        raise VideoTooLongError(video_id)
+    stream = _pick_stream(yt)
+    if not stream:
+        raise NoStreamError(video_id)
+    filesize = stream.filesize if getattr(stream, 'filesize', None) else _content_length(stream.url)
+    return title, duration, stream.url, filesize
+
+@lru_cache(maxsize=1)
+def _nvenc_available():
+    """True if an ffmpeg with the h264_nvenc GPU encoder is on PATH"""
+    if not shutil.which('ffmpeg'):
+        return False
+    try:
+        out = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True, text=True, timeout=10
+        )
+        return 'h264_nvenc' in out.stdout
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+def _transcode_if_oversize(buffer, target_mb=1900):
+    """Re-encode a buffered video on the GPU when it exceeds the upload cap.
+
+    Pipes the buffer through ffmpeg's NVENC encoder, which is several times
+    faster than libx264 and leaves the CPU free for polling and uploads.
+    Returns the original buffer untouched when it is already small enough;
+    otherwise closes it and returns a new spooled buffer with the output.
+    """
+    buffer.seek(0, os.SEEK_END)
+    size = buffer.tell()
+    buffer.seek(0)
+    if size <= target_mb * 1024 * 1024:
+        return buffer
+
+    proc = subprocess.Popen(
+        ['ffmpeg', '-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda',
+         '-i', 'pipe:0', '-c:v', 'h264_nvenc', '-preset', 'p4', '-rc', 'vbr',
+         '-cq', '23', '-c:a', 'copy',
+         '-movflags', 'frag_keyframe+empty_moov', '-f', 'mp4', 'pipe:1'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+
+    def _feed():
+        try:
+            while True:
+                chunk = buffer.read(1024 * 1024)
+                if not chunk:
+                    break
+                proc.stdin.write(chunk)
+        finally:
+            proc.stdin.close()
+
+    # Feed stdin from a thread while draining stdout here, so neither pipe
+    # fills up and deadlocks the encoder
+    feeder = threading.Thread(target=_feed, daemon=True)
+    feeder.start()
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX, mode='w+b')
+    while True:
+        chunk = proc.stdout.read(1024 * 1024)
+        if not chunk:
+            break
+        out.write(chunk)
+    feeder.join()
+    if proc.wait() != 0:
+        out.close()
+        raise RuntimeError('ffmpeg transcode failed')
+    buffer.close()
+    out.seek(0)
+    return out
+
+# In-flight download coalescing: the first request for a video ID does the
+# download, concurrent duplicates await the same future and share the payload
+_INFLIGHT = {}
+# Video IDs currently being piped CDN→Telegram; duplicates of these fall
+# back to the buffered shared path instead of streaming a second time
+_STREAMING = set()
+
+class _SharedFileReader(io.RawIOBase):
+    """Independent cursor over a shared downloaded temp file.
+
+    Reads go through os.pread, so several uploads can stream the same file
+    concurrently without fighting over one file offset. Each reader holds a
+    reference to the file object; the unnamed temp file is closed by the
+    garbage collector once the last reader lets go. Subclassing RawIOBase
+    matters: aiohttp's form-data serializer only accepts IOBase payloads.
+    """
+
+    def __init__(self, file, length):
+        super().__init__()
+        self._file = file
+        self._pos = 0
+        self.len = length  # lets multipart encoders set Content-Length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len - self._pos
+        size = min(size, self.len - self._pos)
+        if size <= 0:
+            return b''
+        data = os.pread(self._file.fileno(), size, self._pos)
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = self.len + offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        self._file = None
+        super().close()
+
+async def _download_shared(video_id, url, length):
+    """Download a video once per ID; concurrent duplicate requests share the payload.
+
+    When a trending link is posted by N users at once, only the first
+    triggers a download — the rest await its future, so egress and CPU do
+    not scale with duplicate demand. Small files resolve to shared bytes;
+    large ones stay in the shared temp file and every caller gets its own
+    positional-read view over it.
+    """
+    fut = _INFLIGHT.get(video_id)
+    if fut is not None:
+        payload = await fut
+    else:
+        fut = asyncio.get_running_loop().create_future()
+        _INFLIGHT[video_id] = fut
+        try:
+            async with DL_SEM:
+                buffer = await asyncio.to_thread(_download, url, length)
+            if length <= SPOOL_MAX:
+                try:
+                    payload = buffer.read()
+                finally:
+                    buffer.close()
+            else:
+                # File-backed: keep it open, readers share it below
+                payload = buffer
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved in case nobody else is waiting
+            raise
+        else:
+            fut.set_result(payload)
+        finally:
+            del _INFLIGHT[video_id]
+
+    if isinstance(payload, bytes):
+        return payload
+    return _SharedFileReader(payload, length)
+
+class _SizedStream:
+    """File-like wrapper advertising its length so multipart encoding can set Content-Length"""
+
+    def __init__(self, raw, length):
+        self._raw = raw
+        self.len = length
+
+    def read(self, size=-1):
+        return self._raw.read(size)
+
+def _stream_through(chat_id, url, length, caption, reply_to_message_id):
+    """Pipe a CDN download directly into a Telegram sendVideo upload.
+
+    Bytes flow from the YouTube response into the multipart request body
+    chunk by chunk, so the video never fully resides in RAM or on disk and
+    total latency is max(download, upload) instead of their sum.
+
+    Flood limits and server errors retry like _tg_call does — the whole
+    transfer restarts from a fresh CDN GET, since the consumed stream can't
+    be replayed.
+    """
+    delay = 1.0
+    for attempt in range(5):
+        resp = SESSION.get(url, stream=True, timeout=60)
+        resp.raise_for_status()
+        encoder = MultipartEncoder(fields={
+            'chat_id': str(chat_id),
+            'caption': caption,
+            'reply_to_message_id': str(reply_to_message_id),
+            'video': ('video.mp4', _SizedStream(resp.raw, length), 'video/mp4'),
+        })
+        api_resp = SESSION.post(
+            f'https://api.telegram.org/bot{BOT_TOKEN}/sendVideo',
+            data=encoder,
+            headers={'Content-Type': encoder.content_type},
+            timeout=600
+        )
+        resp.close()
+        if attempt < 4 and api_resp.status_code == 429:
+            try:
+                retry_after = (api_resp.json().get('parameters') or {}).get('retry_after', delay)
+            except ValueError:
+                retry_after = delay
+            time.sleep(retry_after + 0.5)
+            continue
+        if attempt < 4 and 500 <= api_resp.status_code < 600:
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            continue
+        api_resp.raise_for_status()
+        return
+
+def _download(url, length):
+    """Download url into a file-like buffer (blocking network work).
+
+    Uses the parallel ranged fetch when the size is known, falling back to
+    a serial streaming GET otherwise.
+    """
+    if length:
+        return parallel_download(url, length)
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX, mode='w+b')
+    resp = SESSION.get(url, stream=True, timeout=60)
+    resp.raise_for_status()
+    # Pre-size from the response header when available so writes land in
+    # place instead of growing the buffer through repeated reallocs
+    size = int(resp.headers.get('Content-Length') or 0)
+    if size:
+        buffer.truncate(size)
+        buffer.seek(0)
+    for chunk in resp.iter_content(chunk_size=1024 * 1024):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+# Compiled once at import time so handling a message never rebuilds the pattern
+_YT_RE = re.compile(
+    r'(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/'
+    r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\n]{11})'
+)
+
+def _video_id(url):
+    """Extract the 11-char video ID from a YouTube URL, or None if it isn't one"""
+    # Cheap substring prescreen rejects ordinary chat text before the regex runs
+    if 'youtu' not in url:
+        return None
+    match = _YT_RE.match(url)
+    return match.group(6) if match else None
 
 def is_youtube_url(url):
     """Check if the provided URL is a valid YouTube URL"""
-    youtube_regex = re.compile(
-        r'(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/'
-        r'(watch\?v=|embed/|v/|.+\?v=)?([^&=%\n]{11})'
-    )
-    return youtube_regex.match(url) is not None
+    return _video_id(url) is not None
+
+def _rewind_payloads(values):
+    """Seek any file-like values back to the start so a retry resends them whole"""
+    for value in values:
+        seek = getattr(value, 'seek', None)
+        if seek is not None:
+            try:
+                seek(0)
+            except (OSError, ValueError):
+                pass
+
+async def _tg_call(fn, *args, **kwargs):
+    """Call a Telegram API coroutine, retrying on flood limits and 5xx.
+
+    A 429 waits out the server-provided retry_after; 5xx responses retry
+    with capped exponential backoff. Gives up after 5 attempts; other API
+    errors propagate immediately. File-like arguments are rewound before
+    each retry — the failed attempt left them at EOF, and resending a
+    consumed stream would deliver an empty payload.
+    """
+    delay = 1.0
+    for attempt in range(5):
+        try:
+            return await fn(*args, **kwargs)
+        except ApiTelegramException as e:
+            if attempt == 4:
+                raise
+            if e.error_code == 429:
+                retry_after = (e.result_json.get('parameters') or {}).get('retry_after', delay)
+                await asyncio.sleep(retry_after + 0.5)
+            elif 500 <= e.error_code < 600:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            else:
+                raise
+            _rewind_payloads((*args, *kwargs.values()))
+
+# Error classification: one case-insensitive scan over the exception text
+# instead of repeated substring + lower() passes
+_ERR_RE = re.compile(r'unavailable|403|timeout', re.I)
+_ERR_DETAILS = {
+    'unavailable': "The video might be private, deleted, or geo-restricted.",
+    '403': "Access denied. The video might be age-restricted or private.",
+    'timeout': "Download timeout. Please try again.",
+}
+
+# Debounce status edits per message so progress chatter doesn't eat into the
+# bot-wide 30 msg/s quota
+_EDIT_INTERVAL = 2.0
+_LAST_EDIT = {}
+
+async def _throttled_edit(text, chat_id, message_id, **kwargs):
+    """Edit a status message unless it was edited less than _EDIT_INTERVAL ago"""
+    # Message ids are only unique per chat, so the key needs both
+    key = (chat_id, message_id)
+    now = time.monotonic()
+    last = _LAST_EDIT.get(key)
+    if last is not None and now - last < _EDIT_INTERVAL:
+        return
+    _LAST_EDIT[key] = now
+    await _tg_call(bot.edit_message_text, text, chat_id, message_id, **kwargs)
 
 @bot.message_handler(commands=['start', 'help'])
-def send_welcome(message):
+async def send_welcome(message):
     """Handle /start and /help commands"""
     welcome_text = """
 🎥 *YouTube Video Downloader Bot*
@@ -43,149 +537,250 @@ Welcome! I can help you download YouTube videos.
 
 Just paste any YouTube link and I'll handle the rest! 📹
     """
-    bot.reply_to(message, welcome_text, parse_mode='Markdown')
+    await _tg_call(bot.reply_to, message, welcome_text, parse_mode='Markdown')
 
 @bot.message_handler(content_types=['text'])
-def download_video(message: types.Message):
+async def download_video(message: types.Message):
     """Handle text messages and download YouTube videos"""
-    
+
+    if _WORK_QUEUES is not None:
+        # Parent process in multi-worker mode: hand the update to a worker
+        # and get back to polling immediately. Same video ID, same worker;
+        # everything else round-robins
+        vid = _video_id(message.text.strip())
+        if vid:
+            index = hash(vid) % len(_WORK_QUEUES)
+        else:
+            index = next(_DISPATCH_RR) % len(_WORK_QUEUES)
+        _WORK_QUEUES[index].put(message.json)
+        return
+
     # Check if the message contains a YouTube URL
-    if not is_youtube_url(message.text.strip()):
-        bot.reply_to(message, "❌ Please send a valid YouTube URL.\n\nExample: https://www.youtube.com/watch?v=...")
+    video_id = _video_id(message.text.strip())
+    if not video_id:
+        await _tg_call(bot.reply_to, message, "❌ Please send a valid YouTube URL.\n\nExample: https://www.youtube.com/watch?v=...")
         return
-    
+
     # Send processing message
-    processing_msg = bot.reply_to(message, "⏳ Processing your video... Please wait.")
-    
+    processing_msg = await _tg_call(bot.reply_to, message, "⏳ Processing your video... Please wait.")
+
+    buffer = None
     try:
-        # Create YouTube object
-        yt = YouTube(message.text.strip())
-        
-        # Get video info
-        title = yt.title
-        duration = yt.length
-        
-        # Format duration
-        hours = duration // 3600
-        minutes = (duration % 3600) // 60
-        seconds = duration % 60
-        
-        if hours > 0:
-            duration_str = f"{hours}:{minutes:02d}:{seconds:02d}"
-        else:
-            duration_str = f"{minutes}:{seconds:02d}"
-        
-        # Check video duration (limit to 6 hours)
-        if duration > 21600:  # 6 hours
-            bot.edit_message_text(
-                "❌ Video is too long (>6 hours). Please try a shorter video.",
+        # Get video info (cached per video ID, so repeat links resolve instantly)
+        try:
+            title, duration, stream_url, filesize = await asyncio.to_thread(_resolve, video_id)
+        except NoStreamError:
+            await _tg_call(
+                bot.edit_message_text,
+                "❌ No downloadable streams found for this video.",
                 processing_msg.chat.id,
                 processing_msg.message_id
             )
             return
-        
-        # Update processing message with video info
-        bot.edit_message_text(
-            f"📹 *{title}*\n⏱ Duration: {duration_str}\n\n⬇️ Downloading...",
-            processing_msg.chat.id,
-            processing_msg.message_id,
-            parse_mode='Markdown'
-        )
-        
-        # Download video to buffer
-        buffer = io.BytesIO()
-        
-        # Try to get the best progressive stream first
-        stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
-        
-        if not stream:
-            # Fallback to any progressive stream
-            stream = yt.streams.filter(progressive=True).first()
-        
-        if not stream:
-            # Final fallback to lowest resolution
-            stream = yt.streams.get_lowest_resolution()
-        
-        if not stream:
-            bot.edit_message_text(
-                "❌ No downloadable streams found for this video.",
+        except VideoTooLongError:
+            await _tg_call(
+                bot.edit_message_text,
+                "❌ Video is too long (>6 hours). Please try a shorter video.",
                 processing_msg.chat.id,
                 processing_msg.message_id
             )
             return
         
-        # Check approximate file size
-        if hasattr(stream, 'filesize') and stream.filesize:
-            file_size_mb = stream.filesize / (1024 * 1024)
-            if file_size_mb > 2000:  # 2GB Telegram limit
-                bot.edit_message_text(
-                    f"❌ Video file is too large ({file_size_mb:.1f}MB).\nTelegram limit is 2GB.",
-                    processing_msg.chat.id,
-                    processing_msg.message_id
-                )
-                return
-        
-        # Download to buffer
-        stream.stream_to_buffer(buffer)
-        buffer.seek(0)
+        # Format duration
+        hours, rem = divmod(duration, 3600)
+        minutes, seconds = divmod(rem, 60)
+        duration_str = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
         
-        # Update message for upload
-        bot.edit_message_text(
-            f"📹 *{title}*\n⏱ Duration: {duration_str}\n\n📤 Uploading...",
+        # Build the info header once; status edits concatenate onto it
+        header = f"📹 *{title}*\n⏱ Duration: {duration_str}"
+
+        # Update processing message with video info
+        await _throttled_edit(
+            header + "\n\n⬇️ Downloading...",
             processing_msg.chat.id,
             processing_msg.message_id,
             parse_mode='Markdown'
         )
-        
-        # Send video
-        bot.send_video(
-            message.chat.id,
-            buffer.getvalue(),
-            caption=f"🎬 {title}\n⏱ {duration_str}",
-            reply_to_message_id=message.message_id
+
+        # Check approximate file size — oversized videos can still be served
+        # if a GPU encoder is around to shrink them
+        transcode = False
+        if filesize:
+            file_size_mb = filesize / (1024 * 1024)
+            if file_size_mb > 2000:  # 2GB Telegram limit
+                if not _nvenc_available():
+                    await _tg_call(
+                        bot.edit_message_text,
+                        f"❌ Video file is too large ({file_size_mb:.1f}MB).\nTelegram limit is 2GB.",
+                        processing_msg.chat.id,
+                        processing_msg.message_id
+                    )
+                    return
+                transcode = True
+
+        caption = f"🎬 {title}\n⏱ {duration_str}"
+
+        # Stream-through only when nobody else is transferring this video;
+        # duplicates of an in-flight transfer take the shared buffered path
+        # so the CDN download happens once, not once per user
+        stream_direct = (
+            filesize and filesize > SPOOL_MAX and not transcode
+            and video_id not in _STREAMING and video_id not in _INFLIGHT
         )
-        
+
+        if stream_direct:
+            # Large video: pipe the CDN response straight into the Telegram
+            # upload instead of buffering it first
+            _STREAMING.add(video_id)
+            try:
+                async with DL_SEM:
+                    async with SEND_SEM:
+                        await asyncio.to_thread(
+                            _stream_through,
+                            message.chat.id, stream_url, filesize,
+                            caption, message.message_id
+                        )
+            finally:
+                _STREAMING.discard(video_id)
+        else:
+            # Download to buffer, gated so a burst of links can't eat all
+            # bandwidth; sized downloads are coalesced per video ID so
+            # duplicate links share one transfer
+            if transcode:
+                # Oversized: keep it file-backed (no byte sharing) and
+                # shrink it on the GPU before upload
+                async with DL_SEM:
+                    buffer = await asyncio.to_thread(_download, stream_url, filesize)
+                buffer = await asyncio.to_thread(_transcode_if_oversize, buffer)
+
+                # Hours of high-bitrate video may not fit under the cap even
+                # re-encoded; reject cleanly instead of failing mid-upload
+                buffer.seek(0, os.SEEK_END)
+                if buffer.tell() > 2000 * 1024 * 1024:
+                    await _tg_call(
+                        bot.edit_message_text,
+                        "❌ Video is still too large after transcoding.\nTelegram limit is 2GB.",
+                        processing_msg.chat.id,
+                        processing_msg.message_id
+                    )
+                    return
+                buffer.seek(0)
+                payload = buffer
+            elif filesize:
+                payload = await _download_shared(video_id, stream_url, filesize)
+                if not isinstance(payload, bytes):
+                    buffer = payload  # per-request view; closed in finally
+            else:
+                async with DL_SEM:
+                    buffer = await asyncio.to_thread(_download, stream_url, filesize)
+                buffer.seek(0)
+                payload = buffer
+
+            # Send video — bytes or file-like both stream through telebot's
+            # multipart upload without an extra copy
+            async with SEND_SEM:
+                await _tg_call(
+                    bot.send_video,
+                    message.chat.id,
+                    payload,
+                    caption=caption,
+                    reply_to_message_id=message.message_id
+                )
+
         # Delete processing message
-        bot.delete_message(processing_msg.chat.id, processing_msg.message_id)
-        
-        logger.info(f"Successfully downloaded and sent video: {title}")
-        
+        await _tg_call(bot.delete_message, processing_msg.chat.id, processing_msg.message_id)
+
+        logger.info("Successfully downloaded and sent video: %s", title)
+
     except Exception as e:
-        logger.error(f"Error downloading video: {str(e)}")
-        
-        error_message = "❌ Sorry, I couldn't download this video.\n\n"
-        
-        if "unavailable" in str(e).lower():
-            error_message += "The video might be private, deleted, or geo-restricted."
-        elif "403" in str(e):
-            error_message += "Access denied. The video might be age-restricted or private."
-        elif "timeout" in str(e).lower():
-            error_message += "Download timeout. Please try again."
-        else:
-            error_message += "Please try again later or with a different video."
-        
-        bot.edit_message_text(
+        logger.error("Error downloading video: %s", e)
+
+        match = _ERR_RE.search(str(e))
+        kind = match.group(0).lower() if match else None
+
+        if kind == '403':
+            # Cached stream URLs go stale after a few hours; drop the cache
+            # so a retry re-resolves fresh ones
+            _resolve.cache_clear()
+
+        error_message = (
+            "❌ Sorry, I couldn't download this video.\n\n"
+            + _ERR_DETAILS.get(kind, "Please try again later or with a different video.")
+        )
+
+        await _tg_call(
+            bot.edit_message_text,
             error_message,
             processing_msg.chat.id,
             processing_msg.message_id
         )
-    
+
     finally:
-        # Clean up buffer
-        if 'buffer' in locals():
+        # Clean up buffer and the debounce entry, whether we succeeded or not
+        if buffer is not None:
             buffer.close()
+        _LAST_EDIT.pop((processing_msg.chat.id, processing_msg.message_id), None)
 
 @bot.message_handler(content_types=['photo', 'video', 'document', 'audio', 'voice'])
-def handle_media(message):
+async def handle_media(message):
     """Handle non-text media messages"""
-    bot.reply_to(message, "📝 Please send me a YouTube link as text message.")
+    await _tg_call(bot.reply_to, message, "📝 Please send me a YouTube link as text message.")
+
+def worker_loop(queue):
+    """Run the download pipeline on messages pulled from the dispatch queue.
+
+    Each worker process drives its own event loop; overlapping downloads
+    within a worker still interleave as usual. A None sentinel stops it.
+    """
+    async def _run():
+        loop = asyncio.get_running_loop()
+        pending = set()
+        while True:
+            msg_json = await loop.run_in_executor(None, queue.get)
+            if msg_json is None:
+                break
+            task = asyncio.create_task(download_video(types.Message.de_json(msg_json)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    asyncio.run(_run())
 
 if __name__ == "__main__":
     logger.info("Starting YouTube Downloader Bot...")
+    workers = []
+    if WORKERS > 1:
+        # Fork the workers before setting the queues global, so only the
+        # parent dispatches and the children execute
+        queues = [multiprocessing.Queue() for _ in range(WORKERS)]
+        workers = [
+            multiprocessing.Process(target=worker_loop, args=(queue,), daemon=True)
+            for queue in queues
+        ]
+        for worker in workers:
+            worker.start()
+        _WORK_QUEUES = queues
+        logger.info("Dispatching downloads to %d worker processes", WORKERS)
     try:
-        bot.infinity_polling(timeout=30, long_polling_timeout=15)
+        # Only messages are handled, so don't ask the server for other update
+        # types, and drop the backlog accumulated while the bot was down
+        # timeout is the server-side long-poll hold; request_timeout is the
+        # client timeout and must sit comfortably above it
+        asyncio.run(bot.infinity_polling(
+            timeout=15,
+            request_timeout=30,
+            allowed_updates=['message'],
+            skip_pending=True
+        ))
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot crashed: {str(e)}")
+        logger.error("Bot crashed: %s", e)
         raise
+    finally:
+        # Let workers drain their in-flight downloads and exit
+        for queue in _WORK_QUEUES or []:
+            queue.put(None)
+        for worker in workers:
+            worker.join(timeout=30)